@@ -1,7 +1,6 @@
 import logging
 import os
 import json
-import base64
 from glob import glob
 
 
@@ -48,9 +47,8 @@ class FileInterface:
             self._change_to_files_dir()
             filename = params[0]
             filedata = params[1]
-            decoded_data = base64.b64decode(filedata.encode())
             with open(filename, 'wb') as f:
-                f.write(decoded_data)
+                f.write(filedata)
             return dict(status='OK', data=f"{filename} uploaded successfully")
         except Exception as e:
             return dict(status='ERROR', data=str(e))
@@ -85,9 +83,9 @@ class FileInterface:
             filename = params[0]
             if (filename == ''):
                 return None
-            fp = open(f"{filename}",'rb')
-            isifile = base64.b64encode(fp.read()).decode()
-            return dict(status='OK',data_namafile=filename,data_file=isifile)
+            with open(f"{filename}",'rb') as fp:
+                isifile = fp.read()
+            return dict(status='OK',data_namafile=filename,data_size=len(isifile),data_file=isifile)
         except Exception as e:
             return dict(status='ERROR',data=str(e))
         finally:
@@ -12,8 +12,11 @@ protokol/aturan yang dibuat
 * data yang masuk dari client adalah dalam bentuk bytes yang 
 pada akhirnya akan diproses dalam bentuk string
 
-* class FileProtocol akan memproses data yang masuk dalam bentuk
-string
+* class FileProtocol akan memproses header yang masuk dalam bentuk
+string, isi file (UPLOAD) diterima apa adanya dalam bentuk bytes
+
+* hasil proses berupa pasangan (header, body): header adalah JSON +
+"\r\n\r\n", body adalah isi file mentah sebanyak data_size (khusus GET)
 """
 
 
@@ -21,27 +24,38 @@ string
 class FileProtocol:
     def __init__(self):
         self.file = FileInterface()
-    def proses_string(self, string_datamasuk=''):
+
+    def payload_length(self, string_datamasuk=''):
+        # jumlah byte isi file yang mengikuti header UPLOAD
+        try:
+            c = shlex.split(string_datamasuk.lower())
+            if c[0] == 'upload':
+                return int(c[2])
+        except Exception:
+            pass
+        return 0
+
+    def proses_string(self, string_datamasuk='', payload=b''):
         # logging.warning(f"string diproses: {repr(string_datamasuk)}")
+        body = b''
         try:
-            if '\r\n' in string_datamasuk:
-                header, body = string_datamasuk.split('\r\n', 1)
-            else:
-                header, body = string_datamasuk, ''
-            c = shlex.split(header.lower())
+            c = shlex.split(string_datamasuk.lower())
             c_request = c[0].strip()
             logging.warning(f"memproses request: {c_request}")
             params = c[1:]
 
             if c_request == 'upload':
-                cl = getattr(self.file, c_request)([params[0], body.strip()])
+                cl = getattr(self.file, c_request)([params[0], payload])
             else:
                 cl = getattr(self.file, c_request)(params)
-            return json.dumps(cl)
+            if isinstance(cl, dict) and 'data_file' in cl:
+                body = cl.pop('data_file')
+            hasil = json.dumps(cl)
         except Exception as e:
             logging.error(str(e))
-            return json.dumps(dict(status='ERROR', data='request tidak dikenali'))
-
+            hasil = json.dumps(dict(status='ERROR', data='request tidak dikenali'))
+        # body dikembalikan terpisah agar isi file tidak disalin ulang
+        return hasil.encode() + b"\r\n\r\n", body
 
 
 if __name__=='__main__':
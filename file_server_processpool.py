@@ -11,21 +11,43 @@ class ProcessTheClient:
 
     def __call__(self, conn_addr):
         connection, address = conn_addr
-        d = ''
+        # koneksi tetap dibuka untuk beberapa request sampai client menutupnya
+        d = b''
         while True:
             data = connection.recv(8192)
-            if data:
-                d += data.decode()
-                if "\r\n\r\n" in d:
-                    hasil = self.fp.proses_string(d.strip())
-                    hasil = hasil + "\r\n\r\n"
-                    connection.sendall(hasil.encode())
-                    break
-            else:
+            if not data:
                 break
+            d += data
+            while b"\r\n\r\n" in d:
+                header, d = d.split(b"\r\n\r\n", 1)
+                header = header.decode().strip()
+                length = self.fp.payload_length(header)
+                payload, d = d[:length], d[length:]
+                if len(payload) < length:
+                    payload = self.recv_payload(connection, payload, length)
+                    if payload is None:
+                        connection.close()
+                        return False
+                hasil, body = self.fp.proses_string(header, payload)
+                connection.sendall(hasil)
+                if body:
+                    connection.sendall(body)
         connection.close()
         return True
 
+    def recv_payload(self, connection, payload, length):
+        # isi file langsung ditulis ke satu buffer sebesar ukuran di header
+        buf = bytearray(length)
+        view = memoryview(buf)
+        received = len(payload)
+        view[:received] = payload
+        while received < length:
+            n = connection.recv_into(view[received:], length - received)
+            if not n:
+                return None
+            received += n
+        return buf
+
 class ServerProcessPool:
     def __init__(self, ipaddress='0.0.0.0', port=8889, max_workers=5):
         self.ipinfo = (ipaddress, port)
@@ -46,7 +68,8 @@ class ServerProcessPool:
 
 def main():
     max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else 5
-    svr = ServerProcessPool(ipaddress='0.0.0.0', port=6666, max_workers=max_workers)
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 6666
+    svr = ServerProcessPool(ipaddress='0.0.0.0', port=port, max_workers=max_workers)
     svr.run()
 
 if __name__ == "__main__":
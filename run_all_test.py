@@ -1,38 +1,81 @@
-import json
+import atexit
+import socket
 import subprocess
 import csv
 import time
+from concurrent.futures import ProcessPoolExecutor
 from itertools import product
+from stress_test_client import run_test, generate_test_file
 
-def start_server(server_type, workers):
+# Servers started by this process, terminated on exit if a cell did not get to stop its own
+live_servers = []
+
+def _stop_live_servers():
+    for server_proc in live_servers:
+        server_proc.terminate()
+
+atexit.register(_stop_live_servers)
+
+def start_server(server_type, workers, port=6666):
     if server_type == 'thread':
-        cmd = ['python3', 'file_server_threadpool.py', str(workers)]
+        cmd = ['python3', 'file_server_threadpool.py', str(workers), str(port)]
     else:
-        cmd = ['python3', 'file_server_processpool.py', str(workers)]
-    return subprocess.Popen(cmd)
+        cmd = ['python3', 'file_server_processpool.py', str(workers), str(port)]
+    server_proc = subprocess.Popen(cmd)
+    live_servers.append(server_proc)
+    return server_proc
 
-def run_client_test(operation, server_address, file_size, workers, use_process_pool):
-    cmd = [
-        'python3', 'stress_test_client.py',
-        '--server', server_address,
-        '--operation', operation,
-        '--file-size', str(file_size),
-        '--workers', str(workers)
-    ]
+def wait_ready(address, budget=5.0):
+    # Poll until the server accepts connections instead of sleeping a fixed time
+    deadline = time.time() + budget
+    while time.time() < deadline:
+        try:
+            socket.create_connection(address, timeout=0.05).close()
+            return True
+        except OSError:
+            time.sleep(0.02)
+    return False
+
+def run_cell(test_id, operation, file_size, c_workers, s_type, s_workers, port=6666):
+    print(f"\nTest {test_id}: {operation} {file_size}MB with {c_workers} clients on {s_type} server ({s_workers} workers)")
+    
+    row = {
+        'test_id': test_id,
+        'operation': operation,
+        'file_size_mb': file_size,
+        'client_workers': c_workers,
+        'server_type': s_type,
+        'server_workers': s_workers
+    }
     
-    if use_process_pool:
-        cmd.append('--use-process-pool')
+    server_proc = start_server(s_type, s_workers, port)
     
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode == 0:
-            return json.loads(result.stdout)
-        return None
+        if not wait_ready(('localhost', port)):
+            print(f"Server on port {port} not ready, running the test anyway")
+        result = run_test(('localhost', port), operation, file_size, c_workers, False)
+        row.update({
+            'total_time': result['total_time'],
+            'throughput_bytes_sec': result['throughput'],
+            'client_success': result['successful'],
+            'client_failed': result['failed'],
+            'server_status': 'OK' if server_proc.poll() is None else 'CRASHED'
+        })
     except Exception as e:
         print(f"Client test failed: {str(e)}")
-        return None
+        row['server_status'] = 'ERROR'
+    finally:
+        server_proc.terminate()
+        try:
+            server_proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            server_proc.kill()
+            server_proc.wait()
+        live_servers.remove(server_proc)
+    
+    return row
 
-def main():
+def main(parallel=1):
     test_matrix = [
         ('upload', 10, 1),
         ('upload', 10, 5),
@@ -57,72 +100,61 @@ def main():
     server_types = ['thread', 'process']
     server_workers = [1, 5, 50]
     
-    with open('stress_test_results.csv', 'w', newline='') as csvfile:
-        fieldnames = [
-            'test_id',
-            'operation',
-            'file_size_mb',
-            'client_workers',
-            'server_type',
-            'server_workers',
-            'total_time',
-            'throughput_bytes_sec',
-            'client_success',
-            'client_failed',
-            'server_status'
-        ]
-        
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        
-        test_id = 1
-        for operation, file_size, c_workers in test_matrix:
-            for s_type, s_workers in product(server_types, server_workers):
-                print(f"\nTest {test_id}: {operation} {file_size}MB with {c_workers} clients on {s_type} server ({s_workers} workers)")
-                
-                # Clean previous servers
-                subprocess.run(['pkill', '-f', 'file_server'], stderr=subprocess.DEVNULL)
-                time.sleep(1)
-                
-                server_proc = start_server(s_type, s_workers)
-                time.sleep(2)  # Server warm-up
-                
-                try:
-                    result = run_client_test(operation, 'localhost:6666', file_size, c_workers, False)
-                    
-                    if not result:
-                        writer.writerow({
-                            'test_id': test_id,
-                            'operation': operation,
-                            'file_size_mb': file_size,
-                            'client_workers': c_workers,
-                            'server_type': s_type,
-                            'server_workers': s_workers,
-                            'server_status': 'ERROR'
-                        })
-                        test_id += 1
-                        continue
-                        
-                    writer.writerow({
-                        'test_id': test_id,
-                        'operation': operation,
-                        'file_size_mb': file_size,
-                        'client_workers': c_workers,
-                        'server_type': s_type,
-                        'server_workers': s_workers,
-                        'total_time': result['total_time'],
-                        'throughput_bytes_sec': result['throughput'],
-                        'client_success': result['successful'],
-                        'client_failed': result['failed'],
-                        'server_status': 'OK' if server_proc.poll() is None else 'CRASHED'
-                    })
-                    
-                    test_id += 1
-                    
-                finally:
-                    server_proc.terminate()
-                    server_proc.wait()
-                    time.sleep(1)
+    cells = [
+        (operation, file_size, c_workers, s_type, s_workers)
+        for operation, file_size, c_workers in test_matrix
+        for s_type, s_workers in product(server_types, server_workers)
+    ]
+    
+    # Source files are generated up front so parallel cells never race on them
+    for file_size in sorted({file_size for _, file_size, _ in test_matrix}):
+        generate_test_file(f"source_{file_size}mb.dat", file_size)
+    
+    fieldnames = [
+        'test_id',
+        'operation',
+        'file_size_mb',
+        'client_workers',
+        'server_type',
+        'server_workers',
+        'total_time',
+        'throughput_bytes_sec',
+        'client_success',
+        'client_failed',
+        'server_status'
+    ]
+    
+    # Rows are kept in memory and written in one go at the end; the
+    # finally still saves completed cells if the run is interrupted
+    rows = []
+    try:
+        # Downloads need the files written by the upload cells, so the two
+        # operations run as separate phases. Every cell gets its own port.
+        for phase in ('upload', 'download'):
+            phase_cells = [
+                (test_id, *cell, 6666 + test_id - 1)
+                for test_id, cell in enumerate(cells, 1)
+                if cell[0] == phase
+            ]
+            if parallel > 1:
+                with ProcessPoolExecutor(max_workers=parallel) as executor:
+                    rows.extend(executor.map(run_cell, *zip(*phase_cells)))
+            else:
+                rows.extend(run_cell(*cell) for cell in phase_cells)
+    finally:
+        with open('stress_test_results.csv', 'w', newline='') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=fieldnames, restval='', extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(rows)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Run the full file server stress test matrix')
+    parser.add_argument('--parallel', type=int, default=1,
+                        help='Number of matrix cells to run at once, each against its own server and port '
+                             '(cells then compete for CPU, so timings are not comparable with serial runs)')
+    
+    args = parser.parse_args()
+    
+    main(args.parallel)
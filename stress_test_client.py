@@ -1,40 +1,116 @@
+import asyncio
+import io
 import socket
 import json
-import base64
 import time
 import os
 import random
+from collections import namedtuple
 from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 
+# orjson parses response headers straight from bytes; stdlib json is the fallback
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+RECV_SIZE = 1024 * 1024  # 1 MiB per recv call
+SOCKET_BUFFER_SIZE = 4 * 1024 * 1024  # SO_SNDBUF / SO_RCVBUF for client sockets
+
+# Per-worker outcome, flat so run_test can aggregate it in a single pass
+WorkerResult = namedtuple('WorkerResult', ['success', 'time', 'bytes', 'worker_id'])
+
+# Worker pool shared by every run_test call in this process
+_POOL = None
+
+def _get_pool(num_workers, use_process_pool=False):
+    global _POOL
+    executor_class = ProcessPoolExecutor if use_process_pool else ThreadPoolExecutor
+    if not isinstance(_POOL, executor_class) or _POOL._max_workers < num_workers:
+        if _POOL is not None:
+            _POOL.shutdown()
+        _POOL = executor_class(max_workers=num_workers)
+    return _POOL
+
+def parse_address(server_address):
+    # Parse server address properly
+    if isinstance(server_address, str):
+        host, port = server_address.split(':')
+        return (host, int(port))
+    return server_address
+
+def new_socket():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    # Buffer sizes must be set before connect to affect the TCP window
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_SIZE)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_SIZE)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return sock
+
 class FileClient:
     def __init__(self, server_address='localhost:6666'):
-        # Parse server address properly
-        if isinstance(server_address, str):
-            host, port = server_address.split(':')
-            self.server_address = (host, int(port))
-        else:
-            self.server_address = server_address
-
-    def send_command(self, command_str=""):
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server_address = parse_address(server_address)
+        # One TCP connection is kept open and reused for every command
+        self.sock = None
+
+    def connect(self):
+        if self.sock is None:
+            sock = new_socket()
+            try:
+                sock.connect(self.server_address)
+            except Exception:
+                sock.close()
+                raise
+            self.sock = sock
+        return self.sock
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def send_command(self, command_str="", payload=None):
         try:
-            sock.connect(self.server_address)
+            sock = self.connect()
             sock.sendall(command_str.encode())
-            data_received = b""
-            while True:
-                data = sock.recv(8192)
-                if data:
-                    data_received += data
-                    if b"\r\n\r\n" in data_received:
-                        break
-                else:
-                    break
-            hasil = json.loads(data_received.decode())
+            if isinstance(payload, io.BufferedReader):
+                # File payloads go page cache -> socket via sendfile(2)
+                sock.sendfile(payload)
+            elif payload is not None:
+                sock.sendall(payload)
+            data_received = bytearray()
+            end = -1
+            while end < 0:
+                data = sock.recv(RECV_SIZE)
+                if not data:
+                    raise ConnectionError("connection closed before end of response header")
+                # Only the tail can complete a terminator split across recv calls
+                start = max(len(data_received) - 3, 0)
+                data_received.extend(data)
+                end = data_received.find(b"\r\n\r\n", start)
+            hasil = json_loads(data_received[:end])
+            if hasil.get('status') == 'OK' and 'data_size' in hasil:
+                sisa = memoryview(data_received)[end + 4:]
+                hasil['data_file'] = self.recv_payload(sock, hasil['data_size'], sisa)
             return hasil
         except Exception as e:
+            # The stream state is unknown, reconnect on the next command
+            self.close()
             return {"status": "ERROR", "data": str(e)}
-        finally:
-            sock.close()
+
+    def recv_payload(self, sock, length, initial=b""):
+        # Isi file mentah langsung ditulis ke satu buffer berukuran data_size
+        buf = bytearray(length)
+        view = memoryview(buf)
+        received = len(initial)
+        view[:received] = initial
+        while received < length:
+            n = sock.recv_into(view[received:], length - received)
+            if not n:
+                raise ConnectionError(f"connection closed after {received} of {length} bytes")
+            received += n
+        return buf
 
     def remote_list(self):
         command_str = "LIST\r\n\r\n"
@@ -44,83 +120,207 @@ class FileClient:
         command_str = f"GET {filename}\r\n\r\n"
         hasil = self.send_command(command_str)
         if hasil['status'] == 'OK':
-            return base64.b64decode(hasil['data_file'])
+            return hasil['data_file']
         return None
 
     def remote_upload(self, filename="", file_data=None):
-        chunk_size = 10 * 1024 * 1024  # 10MB chunks
-        encoded_chunks = []
-        
-        for i in range(0, len(file_data), chunk_size):
-            chunk = file_data[i:i+chunk_size]
-            encoded_chunks.append(base64.b64encode(chunk).decode())
-        
-        command_str = f"UPLOAD {filename}\r\n" + "".join(encoded_chunks) + "\r\n\r\n"
-        return self.send_command(command_str)
+        command_str = f"UPLOAD {filename} {len(file_data)}\r\n\r\n"
+        return self.send_command(command_str, file_data)
+
+    def remote_upload_file(self, filename="", path=""):
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            command_str = f"UPLOAD {filename} {size}\r\n\r\n"
+            return self.send_command(command_str, f)
+
+class AsyncFileClient:
+    """Same protocol as FileClient, on asyncio streams instead of a blocking socket."""
+
+    def __init__(self, server_address='localhost:6666'):
+        self.server_address = parse_address(server_address)
+        self.reader = None
+        self.writer = None
+
+    async def connect(self):
+        if self.writer is None:
+            sock = new_socket()
+            try:
+                sock.setblocking(False)
+                await asyncio.get_running_loop().sock_connect(sock, self.server_address)
+            except Exception:
+                sock.close()
+                raise
+            self.reader, self.writer = await asyncio.open_connection(sock=sock, limit=RECV_SIZE)
+
+    async def close(self):
+        if self.writer is not None:
+            writer = self.writer
+            self.reader = self.writer = None
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+    async def send_command(self, command_str="", payload=None):
+        try:
+            await self.connect()
+            self.writer.write(command_str.encode())
+            if isinstance(payload, io.BufferedReader):
+                await self.writer.drain()
+                await asyncio.get_running_loop().sendfile(self.writer.transport, payload)
+            elif payload is not None:
+                self.writer.write(payload)
+            await self.writer.drain()
+            header = await self.reader.readuntil(b"\r\n\r\n")
+            hasil = json_loads(header[:-4])
+            if hasil.get('status') == 'OK' and 'data_size' in hasil:
+                hasil['data_file'] = await self.reader.readexactly(hasil['data_size'])
+            return hasil
+        except Exception as e:
+            # The stream state is unknown, reconnect on the next command
+            await self.close()
+            return {"status": "ERROR", "data": str(e)}
+
+    async def remote_list(self):
+        command_str = "LIST\r\n\r\n"
+        return await self.send_command(command_str)
+
+    async def remote_get(self, filename=""):
+        command_str = f"GET {filename}\r\n\r\n"
+        hasil = await self.send_command(command_str)
+        if hasil['status'] == 'OK':
+            return hasil['data_file']
+        return None
+
+    async def remote_upload(self, filename="", file_data=None):
+        command_str = f"UPLOAD {filename} {len(file_data)}\r\n\r\n"
+        return await self.send_command(command_str, file_data)
+
+    async def remote_upload_file(self, filename="", path=""):
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            command_str = f"UPLOAD {filename} {size}\r\n\r\n"
+            return await self.send_command(command_str, f)
 
 def generate_test_file(filename, size_mb):
-    chunk_size = 1024 * 1024  # 10MB chunks
+    chunk_size = 1024 * 1024  # 1MB chunks
     size = size_mb * chunk_size
     
     if os.path.exists(filename):
-        with open(filename, 'rb') as f:
-            existing_size = os.path.getsize(filename)
-            if existing_size == size:
-                return filename
+        existing_size = os.path.getsize(filename)
+        if existing_size == size:
+            return filename
     
+    # The contents only need to travel over the socket, so one cheap
+    # deterministic pattern chunk is reused instead of os.urandom
+    chunk = bytes(range(256)) * (chunk_size // 256)
     with open(filename, 'wb') as f:
         for _ in range(size_mb):
-            f.write(os.urandom(chunk_size))
+            f.write(chunk)
     return filename
 
-def upload_worker(client, file_size_mb, worker_id):
+def upload_worker(server_address, file_size_mb, worker_id, source_path):
     filename = f"testfile_{file_size_mb}mb.dat"
-    test_filename = f"source_{file_size_mb}mb.dat"
+    client = FileClient(server_address)
     
-    # Generate source file if not exists
-    generate_test_file(test_filename, file_size_mb)
+    try:
+        start_time = time.time()
+        result = client.remote_upload_file(filename, source_path)
+        elapsed = time.time() - start_time
+    finally:
+        client.close()
+    return WorkerResult(
+        success=result.get('status') == 'OK',
+        time=elapsed,
+        bytes=os.path.getsize(source_path),
+        worker_id=worker_id
+    )
+
+def download_worker(server_address, file_size_mb, worker_id):
+    filename = f"testfile_{file_size_mb}mb.dat"
+    client = FileClient(server_address)
     
-    with open(test_filename, 'rb') as f:
-        file_data = f.read()
+    try:
+        start_time = time.time()
+        result = client.remote_get(filename)
+        elapsed = time.time() - start_time
+    finally:
+        client.close()
     
-    start_time = time.time()
-    result = client.remote_upload(filename, file_data)
-    elapsed = time.time() - start_time
-    list_result = client.remote_list()
-    return {
-        'success': result.get('status') == 'OK',
-        'time': elapsed,
-        'bytes': len(file_data),
-        'worker_id': worker_id
-    }
+    return WorkerResult(
+        success=result is not None,
+        time=elapsed,
+        bytes=len(result) if result else 0,
+        worker_id=worker_id
+    )
 
-def download_worker(client, file_size_mb, worker_id):
+async def async_upload_worker(server_address, file_size_mb, worker_id, source_path):
     filename = f"testfile_{file_size_mb}mb.dat"
-    start_time = time.time()
-    result = client.remote_get(filename)
-    elapsed = time.time() - start_time
+    client = AsyncFileClient(server_address)
     
-    return {
-        'success': result is not None,
-        'time': elapsed,
-        'bytes': len(result) if result else 0,
-        'worker_id': worker_id
-    }
+    try:
+        start_time = time.time()
+        result = await client.remote_upload_file(filename, source_path)
+        elapsed = time.time() - start_time
+    finally:
+        await client.close()
+    return WorkerResult(
+        success=result.get('status') == 'OK',
+        time=elapsed,
+        bytes=os.path.getsize(source_path),
+        worker_id=worker_id
+    )
 
-def run_test(server_address, operation, file_size_mb, num_workers, use_process_pool=False):
-    executor_class = ProcessPoolExecutor if use_process_pool else ThreadPoolExecutor
-    worker_func = upload_worker if operation == 'upload' else download_worker
+async def async_download_worker(server_address, file_size_mb, worker_id):
+    filename = f"testfile_{file_size_mb}mb.dat"
+    client = AsyncFileClient(server_address)
     
-    # Create shared client for all workers
-    client = FileClient(server_address)
+    try:
+        start_time = time.time()
+        result = await client.remote_get(filename)
+        elapsed = time.time() - start_time
+    finally:
+        await client.close()
+    
+    return WorkerResult(
+        success=result is not None,
+        time=elapsed,
+        bytes=len(result) if result else 0,
+        worker_id=worker_id
+    )
+
+async def run_async_workers(worker_func, server_address, file_size_mb, num_workers, worker_args=()):
+    return await asyncio.gather(*(
+        worker_func(server_address, file_size_mb, i, *worker_args)
+        for i in range(num_workers)
+    ))
+
+def run_test(server_address, operation, file_size_mb, num_workers, use_process_pool=False, use_asyncio=False):
+    if use_asyncio:
+        worker_func = async_upload_worker if operation == 'upload' else async_download_worker
+    else:
+        worker_func = upload_worker if operation == 'upload' else download_worker
+    
+    # Generate the source file once; workers send it straight from disk
+    worker_args = ()
+    if operation == 'upload':
+        worker_args = (generate_test_file(f"source_{file_size_mb}mb.dat", file_size_mb),)
     
-    with executor_class(max_workers=num_workers) as executor:
+    if use_asyncio:
+        # All workers share one thread and one event loop
+        results = asyncio.run(run_async_workers(
+            worker_func, server_address, file_size_mb, num_workers, worker_args
+        ))
+    else:
+        executor = _get_pool(num_workers, use_process_pool)
         futures = [
             executor.submit(
                 worker_func,
-                client,
+                server_address,
                 file_size_mb,
-                i
+                i,
+                *worker_args
             )
             for i in range(num_workers)
         ]
@@ -130,10 +330,16 @@ def run_test(server_address, operation, file_size_mb, num_workers, use_process_p
             results.append(future.result())
     
     # Calculate statistics
-    successful = sum(1 for r in results if r['success'])
+    successful = 0
+    total_bytes = 0
+    max_time = 0.0
+    for r in results:
+        if r.success:
+            successful += 1
+            total_bytes += r.bytes
+        if r.time > max_time:
+            max_time = r.time
     failed = num_workers - successful
-    total_bytes = sum(r['bytes'] for r in results if r['success'])
-    max_time = max(r['time'] for r in results)
     throughput = total_bytes / max_time if max_time > 0 else 0
     
     return {
@@ -155,7 +361,9 @@ if __name__ == '__main__':
     parser.add_argument('--operation', choices=['upload', 'download'], required=True)
     parser.add_argument('--file-size', type=int, choices=[10, 50, 100], required=True)
     parser.add_argument('--workers', type=int, choices=[1, 5, 50], required=True)
-    parser.add_argument('--use-process-pool', action='store_true')
+    pool_group = parser.add_mutually_exclusive_group()
+    pool_group.add_argument('--use-process-pool', action='store_true')
+    pool_group.add_argument('--use-asyncio', action='store_true', help='Run all workers on one asyncio event loop')
 
     args = parser.parse_args()
     
@@ -164,7 +372,8 @@ if __name__ == '__main__':
         args.operation,
         args.file_size,
         args.workers,
-        args.use_process_pool
+        args.use_process_pool,
+        args.use_asyncio
     )
     
     print(json.dumps(result, indent=2))
\ No newline at end of file